@@ -20,11 +20,27 @@ Usage:
     # Debug agents at: http://localhost:8000
 """
 
-from .sdk import AgencySDK, SDKConfig, AgentConfig
-from .discovery import discover_agents, DiscoveredAgent
-from .client import TinodeClient, Message
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .sdk import AgencySDK, SDKConfig, AgentConfig
+    from .discovery import discover_agents, DiscoveredAgent
+    from .client import TinodeClient, Message
 
 __version__ = "0.3.0"
+
+# Public names are imported on first access (PEP 562) so that importing
+# gathersdk doesn't pull in httpx/websockets until they are actually used
+_LAZY_ATTRS = {
+    "AgencySDK": ".sdk",
+    "SDKConfig": ".sdk",
+    "AgentConfig": ".sdk",
+    "discover_agents": ".discovery",
+    "DiscoveredAgent": ".discovery",
+    "TinodeClient": ".client",
+    "Message": ".client",
+}
 __all__ = [
     "AgencySDK",
     "SDKConfig",
@@ -34,3 +50,16 @@ __all__ = [
     "TinodeClient",
     "Message",
 ]
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_ATTRS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value  # Cache so later lookups skip __getattr__
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,30 @@
+"""
+JSON encoding/decoding for the Tinode wire protocol and ADK responses
+
+Uses orjson when it is installed (pip install gathersdk[fast]) and falls
+back to the standard library otherwise. Every WebSocket packet in either
+direction and every ADK /run reply goes through here, so the faster codec
+pays off on busy workspaces.
+"""
+
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # Optional: pip install gathersdk[fast]
+    orjson = None
+
+
+def dumps(obj: object) -> str:
+    """Serialize obj to a compact JSON string"""
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj, separators=(",", ":"))
+
+
+def loads(data: str | bytes) -> Any:
+    """Parse a JSON document from str or bytes"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
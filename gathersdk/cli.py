@@ -16,6 +16,7 @@ import sys
 from pathlib import Path
 
 import click
+import httpx
 
 from .sdk import AgencySDK
 from .discovery import discover_agents
@@ -233,9 +234,6 @@ def serve(config: str, dir: str, adk_url: str):
 
 async def _serve_async(sdk: AgencySDK, dir: str, adk_url: str):
     """Async portion of serve command"""
-    import httpx
-    from .discovery import discover_agents
-
     # First discover agents locally
     agents = discover_agents(dir)
 
@@ -272,7 +270,7 @@ async def _serve_async(sdk: AgencySDK, dir: str, adk_url: str):
 
     # Register with PocketNode
     click.echo(f"\nRegistering with {sdk.config.pocketnode_url}...")
-    await sdk.discover(dir)
+    await sdk.discover(dir, agents=agents)
 
     if not sdk.runners:
         raise click.ClickException(
@@ -12,18 +12,20 @@ Each agent bot gets its own TinodeClient instance with unique credentials.
 
 import asyncio
 import base64
-import json
 import logging
-from typing import Callable, Optional, Any
+from itertools import islice
+from typing import Awaitable, Callable, Optional, Any
 from dataclasses import dataclass, field
 
 import websockets
 from websockets.client import WebSocketClientProtocol
 
+from . import _json
+
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class Message:
     """Represents a chat message from Tinode"""
     topic: str
@@ -40,19 +42,17 @@ class Message:
 
         # Extract mentions from message format
         # Tinode uses fmt array with mention references
-        mentions = []
-        if "fmt" in data:
-            for fmt in data.get("fmt", []):
-                if fmt.get("tp") == "MN":  # Mention type
-                    ref = fmt.get("key")
-                    if ref:
-                        mentions.append(ref)
+        mentions = [
+            fmt["key"]
+            for fmt in data.get("fmt") or ()
+            if fmt.get("tp") == "MN" and fmt.get("key")  # Mention type
+        ]
 
         # Check if this is a P2P (DM) topic
         # DMs can be either:
         # - p2p... topics (traditional P2P)
         # - usr... topics (when subscribed via user ID)
-        is_dm = topic.startswith("p2p") or topic.startswith("usr")
+        is_dm = topic.startswith(("p2p", "usr"))
 
         return cls(
             topic=topic,
@@ -98,8 +98,25 @@ class TinodeClient:
         # Pending requests (for request-response pattern)
         self._pending: dict[str, asyncio.Future] = {}
 
-        # Track processed messages to avoid duplicates
-        self._processed_messages: set[str] = set()
+        # Topics collected from {meta} replies while subscribe_to_me() and
+        # discover_and_subscribe_channels() are waiting on them
+        self._pending_subs: list[str] = []
+        self._fnd_results: list[str] = []
+
+        # DM targets (user IDs or p2p topics) queued by presence notifications
+        self._pending_dm_subscriptions: set[str] = set()
+
+        # Track processed messages to avoid duplicates (dict keeps insertion
+        # order, so the oldest keys can be evicted first)
+        self._processed_messages: dict[str, None] = {}
+
+        # Packet type -> handler, built once instead of an if/elif chain per packet
+        self._packet_handlers: dict[str, Callable[[dict], Awaitable[None]]] = {
+            "ctrl": self._handle_ctrl,
+            "data": self._handle_data,
+            "meta": self._handle_meta,
+            "pres": self._handle_presence,
+        }
 
     def _next_id(self) -> str:
         """Generate next message ID"""
@@ -170,22 +187,11 @@ class TinodeClient:
         """
         msg_id = self._next_id()
 
-        # For P2P topics (DMs), request recent messages to catch up on any missed messages
-        get_what = "desc sub data"
-        if topic.startswith("p2p") and get_recent:
-            # Request last 10 messages for DMs to catch any we missed
-            get_params = {
-                "what": "desc sub data",
-                "data": {"limit": 10}
-            }
-        else:
-            get_params = {"what": get_what}
-
         await self._send({
             "sub": {
                 "id": msg_id,
                 "topic": topic,
-                "get": get_params
+                "get": self._sub_get_params(topic, get_recent)
             }
         })
 
@@ -194,6 +200,53 @@ class TinodeClient:
         logger.info(f"Subscribed to {topic}")
         return result
 
+    async def subscribe_many(self, topics: list[str]) -> list[str]:
+        """
+        Subscribe to several topics in one batch.
+
+        All {sub} packets are sent up front and their acks collected by a
+        single receive loop, so startup pays one round-trip for N topics
+        instead of N sequential ones.
+        Returns list of topics subscribed to.
+        """
+        msg_topics: dict[str, str] = {}
+        for topic in topics:
+            msg_id = self._next_id()
+            msg_topics[msg_id] = topic
+            await self._send({
+                "sub": {
+                    "id": msg_id,
+                    "topic": topic,
+                    "get": self._sub_get_params(topic)
+                }
+            })
+
+        results = await self._wait_for_ctrls(list(msg_topics))
+
+        subscribed = []
+        for msg_id, topic in msg_topics.items():
+            result = results[msg_id]
+            if isinstance(result, Exception):
+                logger.warning(f"Failed to subscribe to {topic}: {result}")
+                continue
+            self.subscriptions.add(topic)
+            subscribed.append(topic)
+            logger.info(f"Subscribed to {topic}")
+
+        return subscribed
+
+    @staticmethod
+    def _sub_get_params(topic: str, get_recent: bool = True) -> dict:
+        """Build the {sub} 'get' clause for a topic"""
+        # For P2P topics (DMs), request recent messages to catch up on any missed messages
+        if topic.startswith("p2p") and get_recent:
+            # Request last 10 messages for DMs to catch any we missed
+            return {
+                "what": "desc sub data",
+                "data": {"limit": 10}
+            }
+        return {"what": "desc sub data"}
+
     async def subscribe_to_me(self) -> list[str]:
         """
         Subscribe to 'me' topic to get list of subscriptions,
@@ -228,17 +281,12 @@ class TinodeClient:
                 break
 
         # Now subscribe to each topic we're a member of
-        topics = self._pending_subs.copy()
-        self._pending_subs = []
+        # Take ownership of the collected list rather than copying it
+        topics, self._pending_subs = self._pending_subs, []
 
         logger.info(f"Found {len(topics)} topic(s) to subscribe to")
 
-        for topic in topics:
-            if topic.startswith("grp") or topic.startswith("p2p"):
-                try:
-                    await self.subscribe(topic)
-                except Exception as e:
-                    logger.warning(f"Failed to subscribe to {topic}: {e}")
+        await self.subscribe_many([t for t in topics if t.startswith(("grp", "p2p"))])
 
         return topics
 
@@ -307,6 +355,12 @@ class TinodeClient:
         # Get search results
         self._fnd_results = []
         get_msg_id = self._next_id()
+
+        # Tinode answers with a {meta} carrying the matches, or a bare {ctrl}
+        # when there are none - register the ID so either one ends collection
+        get_done = asyncio.get_running_loop().create_future()
+        self._pending[get_msg_id] = get_done
+
         await self._send({
             "get": {
                 "id": get_msg_id,
@@ -315,26 +369,28 @@ class TinodeClient:
             }
         })
 
-        # Collect results
-        for _ in range(10):
-            try:
-                raw = await asyncio.wait_for(self.ws.recv(), timeout=0.5)
-                await self._handle_message(raw)
-            except asyncio.TimeoutError:
-                break
+        # Collect results (stop as soon as the answer arrives rather than
+        # idling until the receive timeout)
+        try:
+            for _ in range(10):
+                try:
+                    raw = await asyncio.wait_for(self.ws.recv(), timeout=0.5)
+                    await self._handle_message(raw)
+                except asyncio.TimeoutError:
+                    break
+                if self._fnd_results or get_done.done():
+                    break
+        finally:
+            self._pending.pop(get_msg_id, None)
+            if get_done.done():
+                get_done.exception()  # Mark an error ctrl as retrieved
 
-        channels = self._fnd_results.copy() if hasattr(self, '_fnd_results') else []
-        self._fnd_results = []
+        channels, self._fnd_results = self._fnd_results, []
 
         logger.info(f"Found {len(channels)} channel(s) in workspace")
 
-        # Subscribe to each channel
-        for channel in channels:
-            try:
-                await self.subscribe(channel)
-                logger.info(f"Subscribed to channel {channel}")
-            except Exception as e:
-                logger.warning(f"Failed to subscribe to channel {channel}: {e}")
+        # Subscribe to all channels in one batch (skipping any already joined via 'me')
+        await self.subscribe_many([c for c in channels if c not in self.subscriptions])
 
         # Leave fnd topic
         leave_msg_id = self._next_id()
@@ -363,7 +419,7 @@ class TinodeClient:
         }
 
         # Publish to workspace topic
-        await self.publish(workspace_id, json.dumps(event))
+        await self.publish(workspace_id, _json.dumps(event))
         logger.info(f"Sent agent:ready event for @{handle}")
 
     async def update_profile(self, name: str, handle: str) -> None:
@@ -439,10 +495,12 @@ class TinodeClient:
 
     async def _send(self, msg: dict) -> None:
         """Send a message to the server"""
+        # Per-packet debug logging uses %-style args so nothing is formatted
+        # unless DEBUG is actually enabled
         if self.ws is None:
             raise RuntimeError("Not connected")
-        data = json.dumps(msg)
-        logger.debug(f">>> {data}")
+        data = _json.dumps(msg)
+        logger.debug(">>> %s", data)
         await self.ws.send(data)
 
     async def _wait_for_ctrl(self, msg_id: str, timeout: float = 10.0) -> dict:
@@ -469,86 +527,122 @@ class TinodeClient:
         finally:
             self._pending.pop(msg_id, None)
 
+    async def _wait_for_ctrls(
+        self,
+        msg_ids: list[str],
+        timeout: float = 10.0
+    ) -> dict[str, dict | Exception]:
+        """
+        Wait for ctrl responses to several requests with one receive loop.
+
+        Returns a mapping of message ID to its ctrl dict, or to the
+        exception for requests that failed or timed out.
+        """
+        loop = asyncio.get_running_loop()
+        futures = {msg_id: loop.create_future() for msg_id in msg_ids}
+        self._pending.update(futures)
+
+        deadline = loop.time() + timeout
+        try:
+            while not all(f.done() for f in futures.values()):
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    raw = await asyncio.wait_for(self.ws.recv(), timeout=min(remaining, 1.0))
+                except asyncio.TimeoutError:
+                    continue
+                await self._handle_message(raw)
+        finally:
+            for msg_id in msg_ids:
+                self._pending.pop(msg_id, None)
+
+        results: dict[str, dict | Exception] = {}
+        for msg_id, future in futures.items():
+            if not future.done():
+                results[msg_id] = Exception(f"Timeout waiting for response to message {msg_id}")
+            elif future.exception() is not None:
+                results[msg_id] = future.exception()
+            else:
+                results[msg_id] = future.result()
+        return results
+
     async def _handle_message(self, raw: str) -> None:
         """Handle incoming WebSocket message"""
-        logger.debug(f"<<< {raw}")
-        msg = json.loads(raw)
-
-        # Control message (response to our requests)
-        if "ctrl" in msg:
-            ctrl = msg["ctrl"]
-            msg_id = ctrl.get("id")
-            if msg_id and msg_id in self._pending:
-                future = self._pending[msg_id]
-                if ctrl.get("code", 0) >= 400:
-                    future.set_exception(
-                        Exception(f"Error {ctrl.get('code')}: {ctrl.get('text')}")
-                    )
-                else:
-                    future.set_result(ctrl)
-
-        # Data message (chat message)
-        elif "data" in msg:
-            data = msg["data"]
-            topic = data.get("topic", "")
-            seq = data.get("seq", 0)
-            from_user = data.get("from", "")
-
-            logger.debug(f"Data message: topic={topic}, from={from_user}, seq={seq}")
-
-            # Don't process our own messages
-            if from_user == self.user_id:
-                logger.debug(f"Ignoring own message in {topic}")
+        logger.debug("<<< %s", raw)
+        msg = _json.loads(raw)
+
+        # Each Tinode packet has a single top-level key naming its type
+        for kind, body in msg.items():
+            handler = self._packet_handlers.get(kind)
+            if handler is not None:
+                await handler(body)
                 return
 
-            # Deduplicate: track by topic + seq number
-            msg_key = f"{topic}:{seq}"
-            if msg_key in self._processed_messages:
-                logger.debug(f"Skipping duplicate message: {msg_key}")
-                return
-            self._processed_messages.add(msg_key)
+    async def _handle_ctrl(self, ctrl: dict) -> None:
+        """Handle control message (response to our requests)"""
+        msg_id = ctrl.get("id")
+        if msg_id and msg_id in self._pending:
+            future = self._pending[msg_id]
+            if ctrl.get("code", 0) >= 400:
+                future.set_exception(
+                    Exception(f"Error {ctrl.get('code')}: {ctrl.get('text')}")
+                )
+            else:
+                future.set_result(ctrl)
+
+    async def _handle_data(self, data: dict) -> None:
+        """Handle data message (chat message)"""
+        topic = data.get("topic", "")
+        seq = data.get("seq", 0)
+        from_user = data.get("from", "")
+
+        logger.debug("Data message: topic=%s, from=%s, seq=%s", topic, from_user, seq)
+
+        # Don't process our own messages
+        if from_user == self.user_id:
+            logger.debug("Ignoring own message in %s", topic)
+            return
+
+        # Deduplicate: track by topic + seq number
+        msg_key = f"{topic}:{seq}"
+        if msg_key in self._processed_messages:
+            logger.debug("Skipping duplicate message: %s", msg_key)
+            return
+        self._processed_messages[msg_key] = None
 
-            # Limit memory - keep only last 1000 message keys
-            if len(self._processed_messages) > 1000:
-                # Remove oldest entries (set doesn't maintain order, so clear half)
-                to_remove = list(self._processed_messages)[:500]
-                for key in to_remove:
-                    self._processed_messages.discard(key)
+        # Limit memory - keep only last 1000 message keys
+        if len(self._processed_messages) > 1000:
+            # Remove the 500 oldest entries without copying the whole key set
+            for key in list(islice(self._processed_messages, 500)):
+                del self._processed_messages[key]
 
-            message = Message.from_data(topic, data)
-            logger.debug(f"Processing: {message.topic} is_dm={message.is_dm}")
+        message = Message.from_data(topic, data)
+        logger.debug("Processing: %s is_dm=%s", message.topic, message.is_dm)
 
-            if self.on_message:
-                try:
-                    self.on_message(message)
-                except Exception as e:
-                    logger.error(f"Error in message handler: {e}")
-
-        # Meta message (topic info, subscriptions)
-        elif "meta" in msg:
-            meta = msg["meta"]
-            # Collect subscriptions from 'me' topic
-            if meta.get("topic") == "me" and "sub" in meta:
-                for sub in meta["sub"]:
-                    topic = sub.get("topic")
-                    if topic and hasattr(self, '_pending_subs'):
-                        self._pending_subs.append(topic)
-                        logger.debug(f"Found subscription: {topic}")
-
-            # Collect fnd search results
-            if meta.get("topic") == "fnd" and "sub" in meta:
-                if not hasattr(self, '_fnd_results'):
-                    self._fnd_results = []
-                for sub in meta["sub"]:
-                    topic = sub.get("topic")
-                    if topic:
-                        self._fnd_results.append(topic)
-                        logger.debug(f"Found channel: {topic}")
-
-        # Presence message
-        elif "pres" in msg:
-            pres = msg["pres"]
-            await self._handle_presence(pres)
+        if self.on_message:
+            try:
+                self.on_message(message)
+            except Exception as e:
+                logger.error(f"Error in message handler: {e}")
+
+    async def _handle_meta(self, meta: dict) -> None:
+        """Handle meta message (topic info, subscriptions)"""
+        # Collect subscriptions from 'me' topic
+        if meta.get("topic") == "me" and "sub" in meta:
+            for sub in meta["sub"]:
+                topic = sub.get("topic")
+                if topic:
+                    self._pending_subs.append(topic)
+                    logger.debug("Found subscription: %s", topic)
+
+        # Collect fnd search results
+        if meta.get("topic") == "fnd" and "sub" in meta:
+            for sub in meta["sub"]:
+                topic = sub.get("topic")
+                if topic:
+                    self._fnd_results.append(topic)
+                    logger.debug("Found channel: %s", topic)
 
     async def _handle_presence(self, pres: dict) -> None:
         """Handle presence notifications"""
@@ -556,7 +650,7 @@ class TinodeClient:
         what = pres.get("what", "")
         src = pres.get("src", "")  # The topic or user this is about
 
-        logger.debug(f"Presence: topic={topic}, what={what}, src={src}")
+        logger.debug("Presence: topic=%s, what=%s, src=%s", topic, what, src)
 
         # Handle DM notifications on 'me' topic
         # When someone sends a DM, we get: topic='me', what='msg', src=<user_id>
@@ -565,8 +659,6 @@ class TinodeClient:
             # src is a user ID (e.g., "usr-L1uZzRJrx4"), not a p2p topic
             # Subscribing to a user ID will get us the P2P topic
             if src.startswith("usr") and src != self.user_id:
-                if not hasattr(self, '_pending_dm_subscriptions'):
-                    self._pending_dm_subscriptions = set()
                 if src not in self._pending_dm_subscriptions:
                     self._pending_dm_subscriptions.add(src)
                     logger.info(f"Queued DM subscription to user: {src}")
@@ -574,8 +666,6 @@ class TinodeClient:
         # Also handle P2P topics directly if we somehow get them
         if topic == "me":
             if src and src.startswith("p2p") and src not in self.subscriptions:
-                if not hasattr(self, '_pending_dm_subscriptions'):
-                    self._pending_dm_subscriptions = set()
                 self._pending_dm_subscriptions.add(src)
                 logger.info(f"Queued DM for subscription: {src}")
 
@@ -591,19 +681,11 @@ class TinodeClient:
         msg_id = self._next_id()
 
         # For P2P topics, request recent messages
-        if topic.startswith("p2p"):
-            get_params = {
-                "what": "desc sub data",
-                "data": {"limit": 10}
-            }
-        else:
-            get_params = {"what": "desc sub data"}
-
         await self._send({
             "sub": {
                 "id": msg_id,
                 "topic": topic,
-                "get": get_params
+                "get": self._sub_get_params(topic)
             }
         })
 
@@ -618,7 +700,7 @@ class TinodeClient:
         - User IDs (e.g., "usr-L1uZzRJrx4") - Tinode resolves to P2P topic
         - P2P topics directly (e.g., "p2pABC123")
         """
-        if not hasattr(self, '_pending_dm_subscriptions') or not self._pending_dm_subscriptions:
+        if not self._pending_dm_subscriptions:
             return
 
         to_subscribe = list(self._pending_dm_subscriptions)
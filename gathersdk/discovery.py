@@ -20,6 +20,11 @@ from dataclasses import dataclass
 
 logger = logging.getLogger(__name__)
 
+# Common non-agent directories skipped during discovery
+SKIP_DIRS = frozenset({
+    "__pycache__", "node_modules", "venv", ".venv", "env", ".git"
+})
+
 
 @dataclass
 class DiscoveredAgent:
@@ -57,9 +62,7 @@ def discover_agents(root_dir: str | Path = ".") -> list[DiscoveredAgent]:
             continue
 
         # Skip hidden folders and common non-agent directories
-        if folder.name.startswith(".") or folder.name in (
-            "__pycache__", "node_modules", "venv", ".venv", "env", ".git"
-        ):
+        if folder.name.startswith(".") or folder.name in SKIP_DIRS:
             continue
 
         init_file = folder / "__init__.py"
@@ -37,11 +37,21 @@ from urllib.parse import urlparse
 
 import httpx
 
+from . import _json
 from .client import TinodeClient, Message
 from .discovery import discover_agents, DiscoveredAgent
 
 logger = logging.getLogger(__name__)
 
+# Cap on how much of an ADK error body is written to the log
+MAX_LOGGED_ERROR_BODY = 500
+
+# ADK session-create statuses meaning the session exists (409 = already exists)
+SESSION_READY_STATUSES = frozenset({200, 409})
+
+# PocketBase login statuses meaning "not this collection, try the next one"
+AUTH_RETRY_STATUSES = frozenset({400, 404})
+
 
 @dataclass
 class AgentConfig:
@@ -118,6 +128,11 @@ class AgentRunner:
         self.config = config
         self.workspace_id = workspace_id
         self.adk_server_url = adk_server_url
+
+        # ADK endpoints for this agent, built once rather than per request
+        self._adk_run_url = f"{adk_server_url}/run"
+        self._adk_users_url = f"{adk_server_url}/apps/{agent.handle}/users"
+
         self.client = TinodeClient(
             server_url=server,
             login=config.bot_login,
@@ -125,10 +140,23 @@ class AgentRunner:
             api_key=api_key
         )
 
+        # Lowercased @handle, computed once for the plain-text mention fallback
+        self._handle_mention = f"@{agent.handle}".lower()
+
         # Session locks to prevent concurrent ADK requests to same session
         # This fixes "stale session" errors when multiple messages arrive simultaneously
         self._session_locks: dict[str, asyncio.Lock] = {}
 
+        # One HTTP client per runner so connections to ADK are kept alive
+        # across messages instead of re-established for every request
+        self._http = httpx.AsyncClient(timeout=60.0)
+
+        # ADK session URLs known to exist, so the create call is made once per session
+        self._known_sessions: set[str] = set()
+
+        # Responses being generated in the background
+        self._response_tasks: set[asyncio.Task] = set()
+
         # Set up message handler
         self.client.on_message = self._handle_message
 
@@ -159,12 +187,19 @@ class AgentRunner:
         """Run the message loop"""
         await self.client.run()
 
+    async def stop(self) -> None:
+        """Finish in-flight responses, then disconnect and release ADK connections"""
+        if self._response_tasks:
+            await asyncio.gather(*self._response_tasks, return_exceptions=True)
+        await self.client.disconnect()
+        await self._http.aclose()
+
     def _handle_message(self, message: Message) -> None:
         """Handle incoming message - decide whether to respond"""
         should_respond = False
         reason = ""
 
-        logger.debug(f"@{self.agent.handle}: message in {message.topic} (is_dm={message.is_dm})")
+        logger.debug("@%s: message in %s (is_dm=%s)", self.agent.handle, message.topic, message.is_dm)
 
         if message.is_dm:
             # Always respond to DMs
@@ -176,9 +211,10 @@ class AgentRunner:
             reason = f"mentioned in {message.topic}"
         else:
             # Fallback: check for @handle in plain text
-            # This handles cases where the frontend sends plain @handle text
-            handle_mention = f"@{self.agent.handle}"
-            if handle_mention.lower() in message.content.lower():
+            # This handles cases where the frontend sends plain @handle text.
+            # Messages without any '@' can't match, so skip lowercasing them
+            content = message.content
+            if "@" in content and self._handle_mention in content.lower():
                 should_respond = True
                 reason = f"handle mentioned in {message.topic}"
 
@@ -186,11 +222,14 @@ class AgentRunner:
             logger.info(
                 f"@{self.agent.handle}: responding to {message.from_user} ({reason})"
             )
-            # Run async response in background
-            asyncio.create_task(self._respond(message))
+            # Run async response in background, holding a reference so the
+            # event loop can't garbage-collect the task before it finishes
+            task = asyncio.create_task(self._respond(message))
+            self._response_tasks.add(task)
+            task.add_done_callback(self._response_tasks.discard)
         else:
             logger.debug(
-                f"@{self.agent.handle}: ignoring message in {message.topic} (not mentioned)"
+                "@%s: ignoring message in %s (not mentioned)", self.agent.handle, message.topic
             )
 
     async def _respond(self, message: Message) -> None:
@@ -217,9 +256,10 @@ class AgentRunner:
 
     def _get_session_lock(self, session_id: str) -> asyncio.Lock:
         """Get or create a lock for a session to serialize requests"""
-        if session_id not in self._session_locks:
-            self._session_locks[session_id] = asyncio.Lock()
-        return self._session_locks[session_id]
+        lock = self._session_locks.get(session_id)
+        if lock is None:
+            lock = self._session_locks[session_id] = asyncio.Lock()
+        return lock
 
     async def _invoke_agent(self, content: str, user_id: str, topic: str) -> Optional[str]:
         """
@@ -234,6 +274,7 @@ class AgentRunner:
         """
         app_name = self.agent.handle
         session_id = f"topic_{topic}"
+        session_url = f"{self._adk_users_url}/{user_id}/sessions/{session_id}"
 
         # Serialize requests to the same session to prevent "stale session" errors
         async with self._get_session_lock(session_id):
@@ -241,69 +282,80 @@ class AgentRunner:
             max_retries = 3
             for attempt in range(max_retries):
                 try:
-                    async with httpx.AsyncClient(timeout=60.0) as client:
-                        # Get fresh session - fetch it to get latest state
-                        session_url = f"{self.adk_server_url}/apps/{app_name}/users/{user_id}/sessions/{session_id}"
-
-                        # First try to create session (idempotent)
-                        session_resp = await client.post(session_url)
-                        if session_resp.status_code not in [200, 409]:  # 409 = already exists
+                    # First try to create session (idempotent) - skipped once
+                    # ADK has confirmed the session exists
+                    if session_url not in self._known_sessions:
+                        session_resp = await self._http.post(session_url)
+                        if session_resp.status_code in SESSION_READY_STATUSES:
+                            self._known_sessions.add(session_url)
+                        else:
                             logger.debug(f"Session creation: {session_resp.status_code}")
 
-                        # Call ADK web server's /run endpoint
-                        response = await client.post(
-                            f"{self.adk_server_url}/run",
-                            json={
-                                "app_name": app_name,
-                                "user_id": user_id,
-                                "session_id": session_id,
-                                "new_message": {
-                                    "parts": [{"text": content}],
-                                    "role": "user"
-                                },
-                                "streaming": False
-                            }
-                        )
-
-                        # Check for stale session error (500 with specific message)
-                        if response.status_code == 500:
-                            error_text = response.text.lower()
-                            if "stale" in error_text or "last_update_time" in error_text:
-                                if attempt < max_retries - 1:
-                                    logger.warning(f"Stale session detected, retrying ({attempt + 1}/{max_retries})...")
-                                    await asyncio.sleep(0.5 * (attempt + 1))  # Backoff
-                                    continue
-                                else:
-                                    logger.error(f"Stale session error after {max_retries} retries")
-                                    return "Error: Session conflict. Please try again."
-
-                            logger.error(f"ADK server error: {response.status_code} - {response.text}")
-                            return f"Error: ADK server returned {response.status_code}"
-
-                        if response.status_code != 200:
-                            logger.error(f"ADK server error: {response.status_code} - {response.text}")
-                            return f"Error: ADK server returned {response.status_code}"
-
-                        # Parse response - array of events
-                        events = response.json()
-
-                        # Extract text from final response event
-                        response_text = ""
-                        for event in events:
-                            # Look for content with text parts
-                            if "content" in event and event["content"]:
-                                content_obj = event["content"]
-                                if "parts" in content_obj:
-                                    for part in content_obj["parts"]:
-                                        if "text" in part:
-                                            response_text += part["text"]
-
-                        if response_text:
-                            logger.debug(f"@{self.agent.handle} response: {response_text[:100]}...")
-                            return response_text
-
-                        logger.warning(f"@{self.agent.handle} produced no response from ADK")
-                        return None
+                    # Call ADK web server's /run endpoint
+                    response = await self._http.post(
+                        self._adk_run_url,
+                        json={
+                            "app_name": app_name,
+                            "user_id": user_id,
+                            "session_id": session_id,
+                            "new_message": {
+                                "parts": [{"text": content}],
+                                "role": "user"
+                            },
+                            "streaming": False
+                        }
+                    )
+
+                    # Session vanished (e.g. ADK server restarted) - forget it and recreate
+                    if response.status_code == 404 and session_url in self._known_sessions:
+                        self._known_sessions.discard(session_url)
+                        if attempt < max_retries - 1:
+                            logger.warning(f"Session {session_id} not found, recreating...")
+                            continue
+
+                    # Check for stale session error (500 with specific message)
+                    if response.status_code == 500:
+                        error_text = response.text.lower()
+                        if "stale" in error_text or "last_update_time" in error_text:
+                            if attempt < max_retries - 1:
+                                logger.warning(f"Stale session detected, retrying ({attempt + 1}/{max_retries})...")
+                                await asyncio.sleep(0.5 * (attempt + 1))  # Backoff
+                                continue
+                            else:
+                                logger.error(f"Stale session error after {max_retries} retries")
+                                return "Error: Session conflict. Please try again."
+
+                        logger.error(f"ADK server error: {response.status_code} - {response.text[:MAX_LOGGED_ERROR_BODY]}")
+                        return f"Error: ADK server returned {response.status_code}"
+
+                    if response.status_code != 200:
+                        logger.error(f"ADK server error: {response.status_code} - {response.text[:MAX_LOGGED_ERROR_BODY]}")
+                        return f"Error: ADK server returned {response.status_code}"
+
+                    # Parse response - array of events (straight from the raw bytes)
+                    events = _json.loads(response.content)
+
+                    # Extract text from final response event (parts are joined
+                    # once at the end instead of concatenated piecemeal)
+                    text_parts = []
+                    for event in events:
+                        # Look for content with text parts (one lookup per key)
+                        content_obj = event.get("content")
+                        if not content_obj:
+                            continue
+                        for part in content_obj.get("parts") or ():
+                            text = part.get("text")
+                            if text:
+                                text_parts.append(text)
+
+                    response_text = "".join(text_parts)
+
+                    if response_text:
+                        logger.debug("@%s response: %.100s...", self.agent.handle, response_text)
+                        return response_text
+
+                    logger.warning(f"@{self.agent.handle} produced no response from ADK")
+                    return None
 
                 except httpx.ConnectError:
                     logger.error(f"Cannot connect to ADK server at {self.adk_server_url}")
@@ -348,9 +400,19 @@ class AgencySDK:
         config = SDKConfig.from_file(path)
         return cls(config, adk_server_url=adk_server_url)
 
-    async def discover(self, root_dir: str | Path = ".") -> list[DiscoveredAgent]:
-        """Discover agents in directory and register them with PocketNode"""
-        self.agents = discover_agents(root_dir)
+    async def discover(
+        self,
+        root_dir: str | Path = ".",
+        agents: Optional[list[DiscoveredAgent]] = None
+    ) -> list[DiscoveredAgent]:
+        """Discover agents in directory and register them with PocketNode
+
+        Args:
+            root_dir: Directory to search for agents
+            agents: Agents already found by discover_agents(root_dir). Passing
+                them skips a second scan, which would re-import every agent module.
+        """
+        self.agents = agents if agents is not None else discover_agents(root_dir)
 
         if not self.agents:
             return self.agents
@@ -385,7 +447,7 @@ class AgencySDK:
                     return data["token"]
 
                 # If 404 (collection not found) or 400 (wrong credentials for this collection), try next
-                if response.status_code not in [400, 404]:
+                if response.status_code not in AUTH_RETRY_STATUSES:
                     response.raise_for_status()
 
             raise Exception("Invalid email or password")
@@ -450,13 +512,13 @@ class AgencySDK:
     def _setup_from_config(self) -> None:
         """Create runners that bridge to ADK web server"""
         for agent in self.agents:
-            if agent.handle not in self.config.agents:
+            agent_config = self.config.agents.get(agent.handle)
+            if agent_config is None:
                 logger.warning(
                     f"Agent @{agent.handle} not registered - skipping"
                 )
                 continue
 
-            agent_config = self.config.agents[agent.handle]
             runner = AgentRunner(
                 agent=agent,
                 config=agent_config,
@@ -486,4 +548,4 @@ class AgencySDK:
     async def stop(self) -> None:
         """Disconnect all agents"""
         for runner in self.runners:
-            await runner.client.disconnect()
+            await runner.stop()